@@ -0,0 +1,100 @@
+"""
+# =============================================================================
+# Script: cache.py
+# Author: maxdaylight
+# Last Updated: 2026-10-15 04:51:54 UTC
+# Updated By: maxdaylight
+# Version: 1.0.2
+# Additional Info: Background refresh failures go to a caller-supplied
+# logger so they reach the calling script's handlers
+# =============================================================================
+
+In-process response cache keyed on the full request URL.
+
+Fresh entries are served directly. Stale entries are served immediately
+while a background thread refreshes them, so callers only block on a
+network round trip when nothing usable is cached.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+from cachetools import TTLCache
+
+T = TypeVar("T")
+
+_logger = logging.getLogger(__name__)
+
+_REFRESH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="cache-refresh"
+)
+
+
+def ttl_cache(
+    ttl: float,
+    *,
+    stale_ttl: float | None = None,
+    maxsize: int = 32,
+    logger: logging.Logger | None = None,
+) -> Callable[[Callable[[str], T]], Callable[[str], T]]:
+    """Cache ``func(url)`` results per URL with stale-while-revalidate.
+
+    Entries younger than ``ttl`` seconds are returned as-is. Entries up to
+    ``ttl + stale_ttl`` seconds old are returned immediately and refreshed
+    in the background; anything older has been evicted and is fetched
+    inline. ``stale_ttl`` defaults to ``ttl``. Exceptions from ``func`` are
+    never cached: inline fetches propagate them and background refreshes
+    log them to ``logger`` (this module's logger by default).
+    """
+    stale_window = ttl if stale_ttl is None else stale_ttl
+    refresh_logger = _logger if logger is None else logger
+
+    def decorator(func: Callable[[str], T]) -> Callable[[str], T]:
+        cache: TTLCache[str, tuple[float, T]] = TTLCache(
+            maxsize=maxsize, ttl=ttl + stale_window, timer=time.monotonic
+        )
+        lock = threading.Lock()
+        refreshing: set[str] = set()
+
+        def store(url: str) -> T:
+            value = func(url)
+            with lock:
+                cache[url] = (time.monotonic(), value)
+            return value
+
+        def refresh(url: str) -> None:
+            try:
+                store(url)
+            except Exception:
+                # Keep serving the stale entry; the next stale hit retries
+                refresh_logger.exception(
+                    "Background refresh failed for %s", url
+                )
+            finally:
+                with lock:
+                    refreshing.discard(url)
+
+        @functools.wraps(func)
+        def wrapper(url: str) -> T:
+            with lock:
+                entry = cache.get(url)
+            if entry is None:
+                return store(url)
+            fetched_at, value = entry
+            if time.monotonic() - fetched_at >= ttl:
+                with lock:
+                    if url not in refreshing:
+                        refreshing.add(url)
+                        _REFRESH_EXECUTOR.submit(refresh, url)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -1,13 +1,19 @@
 import json
 import os
 import smtplib
+import sys
 import time
 from email.message import EmailMessage
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 API_URL = "https://api.kraken.com/0/public/AssetPairs"
 STATE_FILE = "/var/lib/kraken_newlistings/seen_pairs.json"
+JOURNAL_FILE = "/var/lib/kraken_newlistings/seen_pairs.jsonl"
+SNAPSHOT_EVERY = 10  # journal appends between full snapshot rewrites
 CHECK_INTERVAL = 60  # seconds
 
 # Email configuration (read from env or set here)
@@ -17,24 +23,84 @@ EMAIL_TO = "maxdaylight@maximized.site"
 EMAIL_RELAY_HOST = "192.168.0.240"
 EMAIL_RELAY_PORT = 25
 
+# HTTP configuration
+REQUEST_TIMEOUT = (3, 10)  # (connect, read) seconds
+
+
+def build_session():
+    """Create a keep-alive session with retries for the AssetPairs poll."""
+    session = requests.Session()
+    # Single-threaded poller: one connection to api.kraken.com is enough
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=1,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = build_session()
+
+
+# Validators from the last full AssetPairs response, for conditional polls
+last_etag = None
+last_modified = None
+
 
 def fetch_pairs():
-    resp = requests.get(API_URL)
+    """Return the current pair set, or None if AssetPairs is unchanged."""
+    global last_etag, last_modified
+    headers = {}
+    if last_etag:
+        headers["If-None-Match"] = last_etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    resp = SESSION.get(API_URL, headers=headers, timeout=REQUEST_TIMEOUT)
+    if resp.status_code == 304:
+        return None
     resp.raise_for_status()
-    return set(resp.json()["result"].keys())
+    last_etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    return set(orjson.loads(resp.content)["result"].keys())
 
 
 def load_seen_pairs():
+    pairs = set()
     if os.path.exists(STATE_FILE):
         with open(STATE_FILE) as f:
-            return set(json.load(f))
-    return set()
+            pairs.update(json.load(f))
+    if os.path.exists(JOURNAL_FILE):
+        with open(JOURNAL_FILE) as f:
+            for line in f:
+                try:
+                    pairs.update(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn trailing line from an interrupted append
+                    continue
+    return pairs
+
+
+def append_seen_pairs(new_pairs):
+    """Record newly seen pairs as one line in the append-only journal."""
+    os.makedirs(os.path.dirname(JOURNAL_FILE), exist_ok=True)
+    with open(JOURNAL_FILE, 'a') as f:
+        f.write(json.dumps(sorted(new_pairs)) + "\n")
 
 
 def save_seen_pairs(pairs):
+    """Atomically rewrite the full snapshot and reset the journal."""
     os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
-    with open(STATE_FILE, 'w') as f:
-        json.dump(list(pairs), f)
+    tmp_path = STATE_FILE + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(sorted(pairs), f, separators=(",", ":"))
+    os.replace(tmp_path, STATE_FILE)
+    if os.path.exists(JOURNAL_FILE):
+        os.remove(JOURNAL_FILE)
 
 
 def send_email(new_pairs):
@@ -52,24 +118,33 @@ def send_email(new_pairs):
 
 
 def log_new_pairs(new_pairs):
+    # Build each block once so a batch of listings costs one write apiece
+    ts = time.ctime()
     with open("/var/log/kraken_newlistings.log", "a") as logf:
-        for p in new_pairs:
-            logf.write(f"{time.ctime()} - NEW PAIR LISTED: {p}\n")
-            print(f"[ALERT] New Kraken Pair: {p}")
+        logf.write("".join(f"{ts} - NEW PAIR LISTED: {p}\n" for p in new_pairs))
+    sys.stdout.write("".join(f"[ALERT] New Kraken Pair: {p}\n" for p in new_pairs))
+    sys.stdout.flush()
 
 
 def main():
     print("Starting Kraken new listing monitor...")
     seen_pairs = load_seen_pairs()
+    journal_appends = 0
     while True:
         pairs = fetch_pairs()
-        new_pairs = pairs - seen_pairs
+        # None means nothing changed since the last poll (304 Not Modified)
+        new_pairs = pairs - seen_pairs if pairs is not None else set()
         if new_pairs:
             log_new_pairs(new_pairs)
             if EMAIL_ENABLED:
                 send_email(new_pairs)
             seen_pairs |= new_pairs
-            save_seen_pairs(seen_pairs)
+            journal_appends += 1
+            if journal_appends >= SNAPSHOT_EVERY:
+                save_seen_pairs(seen_pairs)
+                journal_appends = 0
+            else:
+                append_seen_pairs(new_pairs)
         time.sleep(CHECK_INTERVAL)
 
 
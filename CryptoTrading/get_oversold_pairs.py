@@ -1,19 +1,26 @@
-import concurrent.futures
+import asyncio
+import atexit
+import functools
 import json
 import logging
+import os
+import queue
 import smtplib
 import tempfile
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from email.message import EmailMessage
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
 
+import aiohttp
+import numpy as np
+import orjson
 import pandas as pd
 import requests
-from ta.momentum import (
-    RSIIndicator,
-    StochasticOscillator,
-)
+from cache import ttl_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Email configuration (read from env or set here)
 EMAIL_ENABLED = True
@@ -30,10 +37,36 @@ LOG_ROTATE_INTERVAL_HOURS = 168  # 7 days
 DEDUP_WINDOW_MINUTES = 30
 DEDUP_PRIMARY_PATH = Path("/var/tmp/crypto-oversold-cache.json")
 
+# HTTP configuration
+REQUEST_TIMEOUT = (3, 10)  # (connect, read) seconds
+MAX_CONCURRENT_REQUESTS = 16  # in-flight OHLC requests
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.3  # seconds; doubles on each retry
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RATE_LIMIT_ERROR = "EGeneral:Too many requests"
+
+# Indicator lookback configuration
+SUPPORT_WINDOW = 90  # bars scanned for the rolling support low
+HISTORY_BARS = SUPPORT_WINDOW + 5  # trailing bars kept per pair
+RSI_WARMUP_BARS = 50  # at least 3x the RSI window so Wilder smoothing settles
+
+# Indicator backend: "numba" (default), "pandas_ta" or "ta"
+INDICATOR_BACKEND = os.environ.get("TA_BACKEND", "numba")
+
+# Asset pair filtering: stablecoin/fiat tickers to exclude as base asset
+EXCLUDE_BASES = frozenset({
+    "USD", "USDT", "USDC", "EUR", "GBP",
+    "DAI", "CHF", "CAD", "JPY", "TRY",
+    "TUSD", "USDD", "UUSD", "GUSD"
+})
+EXCLUDE_PREFIXES = tuple(b + "/" for b in EXCLUDE_BASES)  # wsname prefixes
+ASSET_CODE_STRIP = str.maketrans("", "", "XZ")  # Kraken X/Z asset code prefixes
+
 
 def setup_logger():
     """Configure a logger that writes to a rotating file every 168 hours
-    and also to stdout (captured by journald when run as a service)."""
+    and also to stdout (captured by journald when run as a service).
+    Records are handed to the handlers through a queue listener thread."""
     logger = logging.getLogger("kraken_oversold")
     if logger.handlers:
         return logger
@@ -60,17 +93,42 @@ def setup_logger():
             encoding="utf-8",
         )
     file_handler.setFormatter(fmt)
-    logger.addHandler(file_handler)
 
     stream_handler = logging.StreamHandler()
     stream_handler.setFormatter(fmt)
-    logger.addHandler(stream_handler)
+
+    # Callers only enqueue records; a background listener thread owns the
+    # file and stream handlers so disk writes stay off the calling thread
+    log_queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, file_handler, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
     return logger
 
 
 logger = setup_logger()
 
 
+def build_session():
+    """Create a pooled keep-alive session with retries for Kraken API calls."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=RETRY_TOTAL,
+            backoff_factor=RETRY_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
+        ),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = build_session()
+
+
 def resolve_dedupe_path():
     candidates = [DEDUP_PRIMARY_PATH, Path(tempfile.gettempdir()) / DEDUP_PRIMARY_PATH.name]
     for candidate in candidates:
@@ -138,47 +196,73 @@ class OversoldDedupe:
             logger.warning("Unable to persist dedupe cache: %s", exc)
 
 
+class KrakenAPIError(Exception):
+    """Kraken answered with a non-empty ``error`` list."""
+
+    def __init__(self, url, errors):
+        super().__init__(f"Kraken API error for {url}: {', '.join(errors)}")
+        self.errors = errors
+
+
+def check_kraken_payload(url, data):
+    # Kraken reports failures as HTTP 200 with an "error" list
+    if data.get("error"):
+        raise KrakenAPIError(url, data["error"])
+    return data
+
+
+def get_kraken_json(url):
+    resp = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    return check_kraken_payload(url, orjson.loads(resp.content))
+
+
+# Errors raise before the cache stores anything, so only good payloads are kept
+@ttl_cache(ttl=3600, logger=logger)
+def get_asset_pairs_data(url):
+    return get_kraken_json(url)
+
+
+@ttl_cache(ttl=30, logger=logger)
+def get_ticker_data(url):
+    return get_kraken_json(url)
+
+
 def get_asset_pairs():
-    # Tickers to exclude as base asset
-    exclude_bases = {
-        "USD", "USDT", "USDC", "EUR", "GBP",
-        "DAI", "CHF", "CAD", "JPY", "TRY",
-        "TUSD", "USDD", "UUSD", "GUSD"
-    }
-    resp = requests.get("https://api.kraken.com/0/public/AssetPairs")
-    data = resp.json()
+    data = get_asset_pairs_data("https://api.kraken.com/0/public/AssetPairs")
     pairs = []
+    # A plain pass over the dicts beats building a DataFrame of all ~20
+    # AssetPairs fields only to keep four of them
     for k, v in data["result"].items():
-        altname = v.get("altname", "")
-        wsname = v.get("wsname", "")
-        base = v.get("base", "")
-        quote = v.get("quote", "")
-
-        # Only pairs with USD quote
+        # Only pairs with USD quote (strip X/Z from Kraken asset codes)
+        if not (
+            v.get("quote", "").translate(ASSET_CODE_STRIP) == "USD"
+            or v.get("altname", "").endswith("USD")
+        ):
+            continue
+        # Base asset must not be excluded (stablecoin/fiat); also check
+        # wsname (e.g. "USDT/USD", "EUR/USD")
         if (
-            quote.replace("Z", "").replace("X", "") == "USD"
-            or altname.endswith("USD")
+            v.get("base", "").translate(ASSET_CODE_STRIP) not in EXCLUDE_BASES
+            and not v.get("wsname", "").startswith(EXCLUDE_PREFIXES)
         ):
-            # Extract actual base ticker (strip X/Z for Kraken format)
-            base_ticker = base.replace("X", "").replace("Z", "")
-
-            # Double check base asset is not excluded (stablecoin/fiat)
-            # Also check wsname (e.g. "USDT/USD", "EUR/USD")
-            if (
-                base_ticker not in exclude_bases
-                and not any(wsname.startswith(b + "/") for b in exclude_bases)
-            ):
-                pairs.append(k)
+            pairs.append(k)
     return pairs
 
 
-def is_rebound_candidate(pair):
-    ticker = requests.get(
-        f"https://api.kraken.com/0/public/Ticker?pair={pair}"
-    ).json()['result']
-    info = next(iter(ticker.values()))
-    volume_24h = float(info['v'][1])
-    last_price = float(info['c'][0])
+def fetch_all_tickers(pairs):
+    """Fetch ticker info for every pair in a single batched request."""
+    data = get_ticker_data(
+        f"https://api.kraken.com/0/public/Ticker?pair={','.join(pairs)}"
+    )
+    return data["result"]
+
+
+def is_rebound_candidate(pair, ticker_info):
+    if ticker_info is None:
+        return False
+    volume_24h = float(ticker_info['v'][1])
+    last_price = float(ticker_info['c'][0])
     # Only consider pairs with last_price between $1 and $500
     if not (1 < last_price < 500):
         return False
@@ -186,22 +270,171 @@ def is_rebound_candidate(pair):
     return volume_24h > 100000
 
 
-def get_ohlc(pair, interval=15):
-    resp = requests.get(
-        f"https://api.kraken.com/0/public/OHLC?pair={pair}&interval={interval}"
-    )
-    data = resp.json()["result"]
+@dataclass
+class OHLC:
+    """Float64 high/low/close columns of one pair's OHLC history."""
+
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+
+@dataclass
+class Indicators:
+    """Indicator values for one pair on its last closed candle."""
+
+    rsi: float
+    stoch_k: float
+    entry: float
+    target: float
+    recent_low: float
+
+
+def is_retryable(exc):
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in RETRY_STATUSES
+    if isinstance(exc, KrakenAPIError):
+        return RATE_LIMIT_ERROR in exc.errors
+    return isinstance(exc, (TimeoutError, aiohttp.ClientConnectionError))
+
+
+async def fetch_json(session, url):
+    """GET ``url`` with the same retry/backoff policy as SESSION."""
+    for attempt in range(RETRY_TOTAL + 1):
+        try:
+            async with session.get(url) as resp:
+                resp.raise_for_status()
+                data = orjson.loads(await resp.read())
+            return check_kraken_payload(url, data)
+        except (TimeoutError, aiohttp.ClientError, KrakenAPIError) as exc:
+            if attempt == RETRY_TOTAL or not is_retryable(exc):
+                raise
+        await asyncio.sleep(RETRY_BACKOFF_FACTOR * 2 ** attempt)
+
+
+async def get_ohlc_async(sem, session, pair, interval=15):
+    url = f"https://api.kraken.com/0/public/OHLC?pair={pair}&interval={interval}"
+    async with sem:
+        data = (await fetch_json(session, url))["result"]
     ohlc = next(iter([v for v in data.values() if isinstance(v, list)]))
-    df = pd.DataFrame(
-        ohlc,
-        columns=[
-            "time", "open", "high", "low", "close", "vwap", "volume", "count"
-        ],
+    if not ohlc:
+        empty = np.empty(0, dtype=np.float64)
+        return OHLC(high=empty, low=empty, close=empty)
+    # Rows are [time, open, high, low, close, vwap, volume, count]
+    arr = np.asarray(ohlc, dtype=object)
+    return OHLC(
+        high=arr[:, 2].astype(np.float64),
+        low=arr[:, 3].astype(np.float64),
+        close=arr[:, 4].astype(np.float64),
+    )
+
+
+async def fetch_all_ohlc(pairs, interval=15):
+    """Fetch OHLC for every pair concurrently and return {pair: OHLC}.
+
+    Pairs whose fetch still fails after retries are logged and left out.
+    """
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS)
+    timeout = aiohttp.ClientTimeout(
+        sock_connect=REQUEST_TIMEOUT[0], sock_read=REQUEST_TIMEOUT[1]
     )
-    df["close"] = df["close"].astype(float)
-    df["high"] = df["high"].astype(float)
-    df["low"] = df["low"].astype(float)
-    return df
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=timeout
+    ) as session:
+        outcomes = await asyncio.gather(
+            *(get_ohlc_async(sem, session, pair, interval) for pair in pairs),
+            return_exceptions=True,
+        )
+    ohlc = {}
+    for pair, outcome in zip(pairs, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.warning("OHLC fetch failed for %s: %r", pair, outcome)
+        else:
+            ohlc[pair] = outcome
+    return ohlc
+
+
+@functools.lru_cache(maxsize=1)
+def load_indicator_backend():
+    """Import only the configured backend and return (rsi_last, stoch_k_last).
+
+    Both callables evaluate the indicator at the last element of the arrays
+    they are given.
+    """
+    if INDICATOR_BACKEND == "numba":
+        from indicators import rsi_last, stoch_k_last
+
+        return rsi_last, stoch_k_last
+    if INDICATOR_BACKEND == "ta":
+        from ta.momentum import RSIIndicator, StochasticOscillator
+
+        def ta_rsi_last(close, window=14):
+            rsi = RSIIndicator(close=pd.Series(close), window=window).rsi()
+            return float(rsi.iloc[-1])
+
+        def ta_stoch_k_last(high, low, close, window=14):
+            stoch_k = StochasticOscillator(
+                high=pd.Series(high),
+                low=pd.Series(low),
+                close=pd.Series(close),
+                window=window,
+                smooth_window=3,
+            ).stoch()
+            return float(stoch_k.iloc[-1])
+
+        return ta_rsi_last, ta_stoch_k_last
+    if INDICATOR_BACKEND == "pandas_ta":
+        import pandas_ta
+
+        def pandas_ta_rsi_last(close, window=14):
+            rsi = pandas_ta.rsi(pd.Series(close), length=window)
+            return np.nan if rsi is None else float(rsi.iloc[-1])
+
+        def pandas_ta_stoch_k_last(high, low, close, window=14):
+            # smooth_k=1 yields the raw %K the other backends return
+            stoch = pandas_ta.stoch(
+                pd.Series(high),
+                pd.Series(low),
+                pd.Series(close),
+                k=window,
+                d=3,
+                smooth_k=1,
+            )
+            return np.nan if stoch is None else float(stoch.iloc[-1, 0])
+
+        return pandas_ta_rsi_last, pandas_ta_stoch_k_last
+    raise ValueError(
+        f"Unknown TA_BACKEND {INDICATOR_BACKEND!r}; "
+        "expected one of: numba, pandas_ta, ta"
+    )
+
+
+def warm_indicator_backend():
+    """Resolve the configured backend and run each kernel once.
+
+    Raises on a bad TA_BACKEND before any network work. Numba compiles (or
+    loads its on-disk cache) on the first call, so warming here keeps that
+    one-off cost out of the per-pair loop.
+    """
+    rsi_last, stoch_k_last = load_indicator_backend()
+    sample = np.linspace(1.0, 2.0, RSI_WARMUP_BARS)
+    rsi_last(sample, 14)
+    stoch_k_last(sample, sample, sample, 14)
+
+
+def rolling_min_last(a, window):
+    """Return the minimum of the last ``window`` values of ``a``."""
+    if a.shape[0] < window:
+        return np.nan
+    return float(a[-window:].min())
+
+
+def rolling_mean_last(a, window):
+    """Return the mean of the last ``window`` values of ``a``."""
+    if a.shape[0] < window:
+        return np.nan
+    return float(a[-window:].mean())
 
 
 def min_breakeven_move(entry, maker_fee=0.002, taker_fee=0.0035):
@@ -209,78 +442,96 @@ def min_breakeven_move(entry, maker_fee=0.002, taker_fee=0.0035):
     return rt_fee + 0.001  # Add 0.1% buffer for slippage/execution
 
 
-def analyze(pair, interval, maker_fee=0.002, taker_fee=0.0035):
-    df = get_ohlc(pair, interval=interval)
-    if len(df) < 20:
-        return None, ["insufficient_data"]
-    try:
-        rsi_series = RSIIndicator(close=df["close"], window=14).rsi()
-        stoch_k_series = (
-            StochasticOscillator(
-                high=df["high"],
-                low=df["low"],
-                close=df["close"],
-                window=14,
-                smooth_window=3,
-            ).stoch()
-        )
-    except Exception:
-        rsi_series = pd.Series(dtype=float)
-        stoch_k_series = pd.Series(dtype=float)
-    latest_rsi = rsi_series.iloc[-2] if len(rsi_series) >= 2 else None
-    latest_stoch_k = (
-        stoch_k_series.iloc[-2] if len(stoch_k_series) >= 2 else None
+def analyze(bars):
+    """Compute a rebound candidate's indicators on the last closed candle.
+
+    ``bars`` is None when the OHLC fetch failed. Returns (fail_reasons, None)
+    when there is nothing to measure, else (None, Indicators).
+    """
+    if bars is None:
+        return ["ohlc_fetch_failed"], None
+    if len(bars.close) < 20:
+        return ["insufficient_data"], None
+    # Only the trailing bars feed the indicators read below
+    close = bars.close[-HISTORY_BARS:]
+    high = bars.high[-HISTORY_BARS:]
+    low = bars.low[-HISTORY_BARS:]
+    rsi_last, stoch_k_last = load_indicator_backend()
+    # Evaluate on the last closed candle; the final row is still forming
+    latest_rsi = rsi_last(close[-RSI_WARMUP_BARS - 1:-1], 14)
+    latest_stoch_k = stoch_k_last(high[:-1], low[:-1], close[:-1], 14)
+    return None, Indicators(
+        rsi=latest_rsi,
+        stoch_k=latest_stoch_k,
+        entry=float(close[-2]),  # Likely fill price
+        target=rolling_mean_last(close[:-1], 20),  # Mean reversion (MA 20)
+        recent_low=rolling_min_last(close[:-1], SUPPORT_WINDOW),
     )
 
-    entry = df["close"].iloc[-2]           # Likely fill price
-    target = df["close"].rolling(20).mean().iloc[-2]  # Mean reversion (MA 20)
+
+def classify(analyzed, maker_fee=0.002, taker_fee=0.0035):
+    """Apply the entry criteria to all analyzed pairs in one numpy pass.
+
+    ``analyzed`` holds (pair, fail_reasons, indicators) triples built from
+    analyze() outputs. Returns a (fail_reasons, result) tuple per pair, in
+    input order, matching analyze(): exactly one of the two is set.
+    """
+    outcomes = [(fail_reasons, None) for _, fail_reasons, _ in analyzed]
+    rows = [i for i, (_, _, ind) in enumerate(analyzed) if ind is not None]
+    if not rows:
+        return outcomes
+    measured = [analyzed[i][2] for i in rows]
+
+    def column(field):
+        return np.array([getattr(ind, field) for ind in measured], dtype=np.float64)
+
+    rsi = column("rsi")
+    stoch_k = column("stoch_k")
+    entry = column("entry")
+    target = column("target")
+    recent_low = column("recent_low")
     min_move_pct = min_breakeven_move(entry, maker_fee, taker_fee)
-    actual_move_pct = (target - entry) / entry
+    move_pct = (target - entry) / entry
+    # Example: half the target range for stop
+    stop = entry - (target - entry) / 2
 
+    has_oscillators = ~(np.isnan(rsi) | np.isnan(stoch_k))
+    rsi_ok = rsi < 30
+    stoch_ok = stoch_k < 20
     # Rolling support check
-    recent_low = df['close'].rolling(window=90).min().iloc[-2]
-    last_price = entry
-    near_support = last_price <= recent_low * 1.07
-
-    fail_reasons = []
-    if latest_rsi is None or latest_stoch_k is None:
-        fail_reasons.append("no_rsi_or_stoch")
-    else:
-        if latest_rsi >= 30:
-            fail_reasons.append(f"rsi={latest_rsi:.2f} not < 30")
-        if latest_stoch_k >= 20:
-            fail_reasons.append(f"stoch_k={latest_stoch_k:.2f} not < 20")
-        if not is_rebound_candidate(pair):
-            fail_reasons.append("not_rebound_candidate")
-        if not near_support:
+    near_support = entry <= recent_low * 1.07
+    move_ok = move_pct > min_move_pct
+    passes = has_oscillators & rsi_ok & stoch_ok & near_support & move_ok
+
+    for j, i in enumerate(rows):
+        if passes[j]:
+            outcomes[i] = None, {
+                "pair": analyzed[i][0],
+                "entry": float(entry[j]),
+                "target": float(target[j]),
+                "stop": float(stop[j]),
+                "rsi": float(rsi[j]),
+                "stoch_k": float(stoch_k[j]),
+                "expected_pct": round(float(move_pct[j]) * 100, 2),
+            }
+            continue
+        if not has_oscillators[j]:
+            outcomes[i] = ["no_rsi_or_stoch"], None
+            continue
+        fail_reasons = []
+        if not rsi_ok[j]:
+            fail_reasons.append(f"rsi={rsi[j]:.2f} not < 30")
+        if not stoch_ok[j]:
+            fail_reasons.append(f"stoch_k={stoch_k[j]:.2f} not < 20")
+        if not near_support[j]:
             fail_reasons.append("not_near_support")
-        if actual_move_pct <= min_move_pct:
+        if not move_ok[j]:
             fail_reasons.append(
-
-                    f"move={actual_move_pct*100:.2f}% <= "
-                    f"min_required={min_move_pct*100:.2f}%"
-
+                f"move={move_pct[j]*100:.2f}% <= "
+                f"min_required={min_move_pct*100:.2f}%"
             )
-        if (
-            latest_rsi < 30
-            and latest_stoch_k < 20
-            and is_rebound_candidate(pair)
-            and near_support
-            and actual_move_pct > min_move_pct
-        ):
-            return {
-                "pair": pair,
-                "entry": entry,
-                "target": target,
-                # Example: half the target range for stop
-                "stop": entry - (target - entry) / 2,
-                "rsi": latest_rsi,
-                "stoch_k": latest_stoch_k,
-                "expected_pct": round(
-                    actual_move_pct * 100, 2
-                ),
-            }, None
-    return None, fail_reasons
+        outcomes[i] = fail_reasons, None
+    return outcomes
 
 
 def send_email(good_trades):
@@ -319,6 +570,9 @@ def send_email(good_trades):
 
 def main():
     logger.info("Starting Kraken oversold pairs monitor run...")
+    # Fail fast on a bad TA_BACKEND and compile kernels up front
+    warm_indicator_backend()
+    logger.info("Using %s indicator backend.", INDICATOR_BACKEND)
     pairs = get_asset_pairs()
     logger.info("Fetched %d USD pairs for analysis.", len(pairs))
     dedupe_path = resolve_dedupe_path()
@@ -330,23 +584,31 @@ def main():
         logger.warning(
             "Dedupe persistence disabled; duplicates may reappear across runs."
         )
+    tickers = fetch_all_tickers(pairs)
     good_trades = []
     near_misses = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-        future_to_pair = {
-            executor.submit(analyze, pair, 15): pair for pair in pairs
-        }
-        for future in concurrent.futures.as_completed(future_to_pair):
-            result, fail_reasons = future.result()
-            if result:
-                pair = result['pair']
-                if deduper.should_emit(pair):
-                    deduper.mark(pair)
-                    good_trades.append(result)
-                else:
-                    logger.info("%s skipped due to dedupe window", pair)
-            elif fail_reasons:
-                near_misses.append((future_to_pair[future], fail_reasons))
+    # The ticker price/volume gate runs once, here: only pairs passing it
+    # need OHLC history or indicator math
+    candidates = [
+        pair for pair in pairs if is_rebound_candidate(pair, tickers.get(pair))
+    ]
+    ohlc = asyncio.run(fetch_all_ohlc(candidates))
+    # Indicator math stays in-process: it costs ~20 us per candidate, far
+    # less than starting and feeding a process pool would
+    analyzed_by_pair = {pair: analyze(ohlc.get(pair)) for pair in candidates}
+    not_candidate = (["not_rebound_candidate"], None)
+    analyzed = [
+        (pair, *analyzed_by_pair.get(pair, not_candidate)) for pair in pairs
+    ]
+    for pair, (fail_reasons, result) in zip(pairs, classify(analyzed)):
+        if result:
+            if deduper.should_emit(pair):
+                deduper.mark(pair)
+                good_trades.append(result)
+            else:
+                logger.info("%s skipped due to dedupe window", pair)
+        elif fail_reasons:
+            near_misses.append((pair, fail_reasons))
     print('Profitable Reversion Trades:')
     logger.info('Profitable Reversion Trades:')
     if good_trades:
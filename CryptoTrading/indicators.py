@@ -0,0 +1,59 @@
+"""
+# =============================================================================
+# Script: indicators.py
+# Author: maxdaylight
+# Last Updated: 2026-10-15 04:36:44 UTC
+# Updated By: maxdaylight
+# Version: 2.0.0
+# Additional Info: Numba backend only; rolling helpers moved to the
+# scanner so other TA backends do not import numba
+# =============================================================================
+
+Numba indicator backend: scalar kernels over raw float64 numpy arrays.
+
+Each kernel returns only the single value the scanner reads, so no
+intermediate Series is built. Results match the ``ta`` library definitions
+(Wilder RSI seeded at the first bar and raw stochastic %K) and are NaN
+when there is not enough history. Imported only when ``TA_BACKEND`` is
+``numba`` (the default).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def rsi_last(close: np.ndarray, window: int = 14) -> float:
+    """Return Wilder's RSI at the last element of ``close``."""
+    n = close.shape[0]
+    if n < window:
+        return np.nan
+    alpha = 1.0 / window
+    avg_up = 0.0
+    avg_down = 0.0
+    for i in range(1, n):
+        diff = close[i] - close[i - 1]
+        up = diff if diff > 0.0 else 0.0
+        down = -diff if diff < 0.0 else 0.0
+        avg_up = (1.0 - alpha) * avg_up + alpha * up
+        avg_down = (1.0 - alpha) * avg_down + alpha * down
+    if avg_down == 0.0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + avg_up / avg_down)
+
+
+@njit(cache=True)
+def stoch_k_last(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14
+) -> float:
+    """Return the stochastic oscillator %K at the last element of ``close``."""
+    n = close.shape[0]
+    if n < window:
+        return np.nan
+    lowest = low[n - window:].min()
+    highest = high[n - window:].max()
+    if highest == lowest:
+        return np.nan
+    return float(100.0 * (close[n - 1] - lowest) / (highest - lowest))
@@ -2,11 +2,11 @@
 # =============================================================================
 # Script: utils.py
 # Author: maxdaylight
-# Last Updated: 2025-10-08 00:02:51 UTC
+# Last Updated: 2026-10-15 04:36:00 UTC
 # Updated By: maxdaylight
-# Version: 1.0.0
-# Additional Info: Color output and logging utilities
-# with ANSI stripping for files
+# Version: 1.0.3
+# Additional Info: Resolve color prefixes and stdout TTY state
+# once at import for write_color_output
 # =============================================================================
 
 Utilities for consistent colorized console output and structured logging
@@ -16,6 +16,7 @@ with UTC timestamps.
 from __future__ import annotations
 
 import datetime
+import functools
 import logging
 import os
 import re
@@ -56,10 +57,35 @@ ANSI_COLORS: dict[str, str] = {
     "darkgray": "\033[90m",
 }
 
+# Color prefixes and TTY state are resolved once at import, not per call
+if HAS_COLORAMA:
+    assert Fore is not None
+    _COLOR_MAP: dict[str, str] = {
+        "white": Fore.WHITE,
+        "cyan": Fore.CYAN,
+        "green": Fore.GREEN,
+        "yellow": Fore.YELLOW,
+        "red": Fore.RED,
+        "magenta": Fore.MAGENTA,
+        "darkgray": Fore.LIGHTBLACK_EX,
+    }
+    _DEFAULT_PREFIX = Fore.WHITE
+else:
+    _COLOR_MAP = ANSI_COLORS
+    _DEFAULT_PREFIX = ANSI_COLORS["white"]
+
+_STDOUT_IS_TTY = sys.stdout.isatty()
+
 ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
 
+# Log directories already ensured by build_logger in this process
+_dirs_created: set[str] = set()
+
 
 def strip_ansi(s: str) -> str:
+    # Most log records carry no escapes; skip the regex engine for them
+    if "\x1b" not in s:
+        return s
     return ANSI_RE.sub("", s)
 
 
@@ -72,28 +98,24 @@ def write_color_output(message: str, *, color: str = "white") -> None:
 
     color_key = color.lower()
     if HAS_COLORAMA:
-        assert Fore is not None and Style is not None
-        color_map = {
-            "white": Fore.WHITE,
-            "cyan": Fore.CYAN,
-            "green": Fore.GREEN,
-            "yellow": Fore.YELLOW,
-            "red": Fore.RED,
-            "magenta": Fore.MAGENTA,
-            "darkgray": Fore.LIGHTBLACK_EX,
-        }
-        prefix = color_map.get(color_key, Fore.WHITE)
+        assert Style is not None
+        prefix = _COLOR_MAP.get(color_key, _DEFAULT_PREFIX)
         print(f"{prefix}{message}{Style.RESET_ALL}")
     else:
         # If not TTY or on platforms without ANSI support, print plain text
-        if sys.stdout.isatty():
-            prefix = ANSI_COLORS.get(color_key, ANSI_COLORS["white"])
+        if _STDOUT_IS_TTY:
+            prefix = _COLOR_MAP.get(color_key, _DEFAULT_PREFIX)
         else:
             prefix = ""
         reset = ANSI_COLORS["reset"] if prefix else ""
         print(f"{prefix}{message}{reset}")
 
 
+@functools.lru_cache(maxsize=1)
+def _hostname() -> str:
+    return socket.gethostname()
+
+
 class AnsiStrippingFileHandler(logging.FileHandler):
     def emit(
         self, record: logging.LogRecord
@@ -130,10 +152,12 @@ def build_logger(
     console.setFormatter(fmt)
     logger.addHandler(console)
 
-    host = socket.gethostname()
+    host = _hostname()
     ts = datetime.datetime.now(datetime.UTC).strftime("%Y-%m-%d_%H-%M-%S")
     base_dir = log_dir or os.path.dirname(__file__)
-    os.makedirs(base_dir, exist_ok=True)
+    if base_dir not in _dirs_created:
+        os.makedirs(base_dir, exist_ok=True)
+        _dirs_created.add(base_dir)
     log_path = os.path.join(base_dir, f"{name}_{host}_{ts}.log")
 
     file_handler = AnsiStrippingFileHandler(log_path, encoding="utf-8")